@@ -1,6 +1,10 @@
+import io
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime, timezone
 from streamlit_autorefresh import st_autorefresh
 
@@ -13,7 +17,13 @@ st.set_page_config(page_title="SOTU Leaderboard", layout="wide")
 # Session state: cache ticker maps so we don't re-fetch every rerun
 # ---------------------------------------------------------------------------
 if "title_to_ticker" not in st.session_state:
-    st.session_state.title_to_ticker = {}
+    st.session_state.title_to_ticker = {}  # (label, title) -> market ticker
+
+
+def _store_ticker_map(label: str, markets: list[dict]):
+    st.session_state.title_to_ticker.update(
+        {(label, title): ticker for title, ticker in kalshi.build_title_to_ticker_map(markets).items()}
+    )
 
 
 def _ensure_ticker_map():
@@ -21,12 +31,72 @@ def _ensure_ticker_map():
         return
     try:
         all_markets = kalshi.fetch_all_markets()
-        for label, markets in all_markets.items():
-            st.session_state.title_to_ticker[label] = kalshi.build_title_to_ticker_map(markets)
+        for label, (markets, _) in all_markets.items():
+            _store_ticker_map(label, markets)
     except Exception as e:
         st.warning(f"Could not fetch Kalshi ticker map: {e}")
 
 
+def _validate_picks(raw: pd.DataFrame) -> list[str]:
+    pick_cols = [c for c in raw.columns if "pick" in c]
+    if not pick_cols:
+        return []
+    vals = raw[pick_cols].stack().dropna().astype(str).str.strip()
+    vals = vals[(vals != "") & (vals.str.lower() != "nan")]
+    bad = vals[~db.pick_keys(vals).isin(list(db.PICK_LOOKUP))]
+    return [f"Row {idx + 1}, {col}: '{val}' not a valid option" for (idx, col), val in bad.items()]
+
+
+# ---------------------------------------------------------------------------
+# Cached DB reads: invalidated after every write
+# ---------------------------------------------------------------------------
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_picks() -> pd.DataFrame:
+    return db.get_picks()
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_leaderboard() -> pd.DataFrame:
+    return db.get_leaderboard()
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_snapshots(event_ticker: str = "", titles: tuple[str, ...] = ()) -> pd.DataFrame:
+    return db.get_snapshots(event_ticker, titles)
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_latest_snapshots(event_ticker: str) -> pd.DataFrame:
+    return db.get_latest_snapshots(event_ticker)
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _get_pick_details() -> pd.DataFrame:
+    return db.get_pick_details()
+
+
+@st.cache_data(show_spinner=False)
+def _parse_xlsx(blob: bytes) -> pd.DataFrame:
+    # Keyed on the file bytes, so openpyxl only parses each upload once
+    return pd.read_excel(io.BytesIO(blob), engine="openpyxl", dtype=str)
+
+
+MAX_CHART_POINTS = 1000
+
+
+def _downsample(g: pd.DataFrame, max_points: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    # Even stride over the rows, always keeping the last one so lines end at the current price
+    if len(g) <= max_points:
+        return g
+    step = -(-len(g) // max_points)
+    return g.iloc[np.unique(np.r_[np.arange(0, len(g), step), len(g) - 1])]
+
+
+def _invalidate_reads():
+    for fn in (_get_picks, _get_leaderboard, _get_snapshots, _get_latest_snapshots, _get_pick_details):
+        fn.clear()
+
+
 # ---------------------------------------------------------------------------
 # Sidebar navigation
 # ---------------------------------------------------------------------------
@@ -76,16 +146,7 @@ if page == "Upload Picks":
                 st.subheader("Preview")
                 st.dataframe(raw, use_container_width=True)
 
-                pick_cols = [c for c in raw.columns if "pick" in c]
-                errors = []
-                for idx, row in raw.iterrows():
-                    for col in pick_cols:
-                        val = str(row[col]).strip()
-                        if not val or val.lower() == "nan":
-                            continue
-                        cat, _, _ = db.validate_pick(val)
-                        if cat is None:
-                            errors.append(f"Row {idx + 1}, {col}: '{val}' not a valid option")
+                errors = _validate_picks(raw)
 
                 if errors:
                     st.error("Validation errors:")
@@ -97,6 +158,7 @@ if page == "Upload Picks":
                         _ensure_ticker_map()
                         db.clear_picks()
                         db.save_picks(raw, st.session_state.title_to_ticker)
+                        _invalidate_reads()
                         st.toast("Picks synced from Google Sheet.")
                         st.rerun()
 
@@ -105,7 +167,7 @@ if page == "Upload Picks":
         uploaded = st.file_uploader("Choose .xlsx file", type=["xlsx"])
 
         if uploaded is not None:
-            raw = pd.read_excel(uploaded, engine="openpyxl")
+            raw = _parse_xlsx(uploaded.getvalue())
             raw.columns = [c.strip().lower().replace(" ", "_").rstrip(":_") for c in raw.columns]
             name_col = next((c for c in raw.columns if "name" in c), None)
             if name_col and name_col != "name":
@@ -114,16 +176,7 @@ if page == "Upload Picks":
             st.subheader("Preview")
             st.dataframe(raw, use_container_width=True)
 
-            pick_cols = [c for c in raw.columns if "pick" in c]
-            errors = []
-            for idx, row in raw.iterrows():
-                for col in pick_cols:
-                    val = str(row[col]).strip()
-                    if not val or val.lower() == "nan":
-                        continue
-                    cat, _, _ = db.validate_pick(val)
-                    if cat is None:
-                        errors.append(f"Row {idx + 1}, {col}: '{val}' not a valid option")
+            errors = _validate_picks(raw)
 
             if errors:
                 st.error("Validation errors:")
@@ -134,12 +187,13 @@ if page == "Upload Picks":
                 if st.button("Lock In Picks", key="lock_file"):
                     _ensure_ticker_map()
                     db.save_picks(raw, st.session_state.title_to_ticker)
+                    _invalidate_reads()
                     st.toast("Picks locked in.")
                     st.rerun()
 
     st.divider()
     st.subheader("Locked Picks")
-    picks_df = db.get_picks()
+    picks_df = _get_picks()
     if picks_df.empty:
         st.info("No picks locked yet.")
     else:
@@ -149,6 +203,7 @@ if page == "Upload Picks":
     if not picks_df.empty:
         if st.button("Clear All Picks", type="secondary"):
             db.clear_picks()
+            _invalidate_reads()
             st.rerun()
 
 # ============================= PAGE 2 =====================================
@@ -157,13 +212,16 @@ elif page == "Market Tracker":
 
     tick = st_autorefresh(interval=60_000, key="market_autorefresh")
 
-    def _refresh_markets():
+    def _refresh_markets(force: bool = False):
         try:
-            all_markets = kalshi.fetch_all_markets()
-            for label, markets in all_markets.items():
+            all_markets = kalshi.fetch_all_markets(force=force)
+            changed = 0
+            for label, (markets, fetched_at) in all_markets.items():
                 parsed = [kalshi.parse_market_row(m) for m in markets]
-                db.save_snapshot(parsed)
-                st.session_state.title_to_ticker[label] = kalshi.build_title_to_ticker_map(markets)
+                changed += db.save_snapshot(parsed, fetched_at)
+                _store_ticker_map(label, markets)
+            if changed:
+                _invalidate_reads()
             return True
         except Exception as e:
             st.error(f"API error: {e}")
@@ -173,7 +231,7 @@ elif page == "Market Tracker":
     with col1:
         if st.button("Refresh Now"):
             with st.spinner("Fetching from Kalshi..."):
-                if _refresh_markets():
+                if _refresh_markets(force=True):
                     st.success("Snapshot saved.")
     with col2:
         st.caption("Auto-refreshes every 60 seconds")
@@ -185,14 +243,12 @@ elif page == "Market Tracker":
         heading = "What Will Trump Say" if label == "say" else "Who Will Trump Mention"
         st.subheader(heading)
 
-        snaps = db.get_snapshots(event_ticker)
-        if snaps.empty:
+        latest = _get_latest_snapshots(event_ticker)
+        if latest.empty:
             st.info("No snapshots yet. Click Refresh Markets.")
             continue
 
-        latest_time = snaps["snapshot_time"].max()
-        latest = snaps[snaps["snapshot_time"] == latest_time].copy()
-        latest = latest.sort_values("title")
+        latest_time = latest["snapshot_time"].max()
 
         st.markdown(f"**Latest snapshot:** {latest_time}")
         st.dataframe(
@@ -204,26 +260,39 @@ elif page == "Market Tracker":
         )
 
         picked_options = set()
-        picks_df = db.get_picks()
+        picks_df = _get_picks()
         if not picks_df.empty:
             point_map = db.SAY_POINTS if label == "say" else db.MENTION_POINTS
             picked_options = set(p for p in picks_df["pick"] if p in point_map)
 
         filter_picked = st.checkbox(f"Show only picked options ({heading})", key=f"filter_{label}")
-        chart_data = snaps.copy()
-        if filter_picked and picked_options:
-            chart_data = chart_data[chart_data["title"].isin(picked_options)]
+        titles = tuple(sorted(picked_options)) if filter_picked else ()
+        chart_data = _get_snapshots(event_ticker, titles)
 
         if not chart_data.empty:
-            fig = px.line(
-                chart_data,
-                x="snapshot_time",
-                y="yes_price",
-                color="title",
+            # The log only records changes, so close every line at the latest poll
+            closing = latest.loc[latest["title"].isin(chart_data["title"]), ["title", "yes_price", "snapshot_time"]]
+            chart_data = pd.concat([chart_data, closing], ignore_index=True)
+
+            fig = go.Figure()
+            for title, g in chart_data.groupby("title"):
+                g = _downsample(g)
+                fig.add_trace(
+                    go.Scattergl(
+                        x=g["snapshot_time"],
+                        y=g["yes_price"],
+                        name=title,
+                        mode="lines",
+                        line_shape="hv",
+                    )
+                )
+            fig.update_layout(
                 title=f"{heading} -- YES Price Over Time",
-                labels={"snapshot_time": "Time", "yes_price": "YES Price ($)", "title": "Option"},
+                xaxis_title="Time",
+                yaxis_title="YES Price ($)",
+                legend_title_text="Option",
+                height=500,
             )
-            fig.update_layout(height=500)
             st.plotly_chart(fig, use_container_width=True)
 
 # ============================= PAGE 3 =====================================
@@ -233,20 +302,21 @@ elif page == "Leaderboard":
     if st.button("Finalize Scores"):
         with st.spinner("Fetching latest results and calculating..."):
             try:
-                all_markets = kalshi.fetch_all_markets()
-                for label, markets in all_markets.items():
+                all_markets = kalshi.fetch_all_markets(force=True)
+                for label, (markets, fetched_at) in all_markets.items():
                     parsed = [kalshi.parse_market_row(m) for m in markets]
-                    db.save_snapshot(parsed)
-                    st.session_state.title_to_ticker[label] = kalshi.build_title_to_ticker_map(markets)
+                    db.save_snapshot(parsed, fetched_at)
+                    _store_ticker_map(label, markets)
                 db.backfill_tickers(st.session_state.title_to_ticker)
                 scores = db.calculate_scores()
+                _invalidate_reads()
                 st.success("Scores updated from latest market data.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
     st.subheader("Scoreboard")
-    board = db.get_leaderboard()
-    picks_exist = not db.get_picks().empty
+    board = _get_leaderboard()
+    picks_exist = not _get_picks().empty
 
     if board.empty and not picks_exist:
         st.info("No picks uploaded yet.")
@@ -279,33 +349,22 @@ elif page == "Leaderboard":
     st.divider()
     st.subheader("Pick Breakdown")
     st.caption("Points = YES price at lock-in x100. If market resolves YES you earn those points; NO = 0.")
-    details = db.get_pick_details()
+    details = _get_pick_details()
     if details.empty:
         st.info("No picks to show.")
     else:
-        def _status_label(row):
-            r = row.get("result", "")
-            if r == "yes":
-                return "YES -- Earned"
-            elif r == "no":
-                return "NO -- 0 pts"
-            return "Pending"
-
-        def _earned(row):
-            if row.get("result", "") == "yes":
-                return row["points"]
-            if row.get("result", "") == "no":
-                return 0
-            return ""
-
-        details["outcome"] = details.apply(_status_label, axis=1)
-        details["earned"] = details.apply(_earned, axis=1)
-
-        for name in details["name"].unique():
-            person = details[details["name"] == name].copy()
-            resolved = person[person["result"].isin(["yes", "no"])]
-            earned_total = resolved.apply(lambda r: r["points"] if r["result"] == "yes" else 0, axis=1).sum() if not resolved.empty else 0
-            pending = (person["result"] == "").sum() + person["result"].isna().sum()
+        res = details["result"].to_numpy()
+        is_yes, is_no = res == "yes", res == "no"
+        details["outcome"] = np.select([is_yes, is_no], ["YES -- Earned", "NO -- 0 pts"], "Pending")
+        details["earned"] = np.select([is_yes, is_no], [details["points"].to_numpy(dtype=object), 0], "")
+        details["earned_pts"] = np.where(is_yes, details["points"], 0)
+        details["is_pending"] = res == ""
+
+        grouped = details.groupby("name", sort=False)
+        totals = grouped.agg(earned=("earned_pts", "sum"), pending=("is_pending", "sum"))
+
+        for name, person in grouped:
+            earned_total, pending = totals.loc[name, ["earned", "pending"]]
 
             header = f"{name} -- {int(earned_total)} pts earned"
             if pending > 0:
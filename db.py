@@ -1,5 +1,6 @@
 import re
 import sqlite3
+import threading
 import pandas as pd
 from datetime import datetime, timezone
 from pathlib import Path
@@ -107,19 +108,53 @@ ALL_POINTS = {**SAY_POINTS, **MENTION_POINTS}
 _POINTS_SUFFIX = re.compile(r"\s*[—–-]\s*\d+\s*[Pp]oints?\s*$")
 
 
-def strip_points_label(raw: str) -> str:
-    return _POINTS_SUFFIX.sub("", raw).strip()
+# Whitespace variants users paste from sheets; deleted in one C-level translate
+_STRIP_TBL = str.maketrans("", "", " \t\n\r\xa0")
 
 
-def resolve_pick(pick: str) -> str:
-    pick = strip_points_label(pick)
-    return ALIASES.get(pick, pick)
+def pick_key(raw: str) -> str:
+    """Normalize a raw pick to its PICK_LOOKUP key (no whitespace, lowercase, no points tail)."""
+    key = raw.translate(_STRIP_TBL).lower()
+    # Only pay for the regex when there is actually a "N points" tail
+    if "oint" in key[-6:]:
+        key = _POINTS_SUFFIX.sub("", key)
+    return key
+
+
+def pick_keys(values: pd.Series) -> pd.Series:
+    """Vectorized pick_key: the regex only sees rows with a points tail."""
+    keys = values.str.translate(_STRIP_TBL).str.lower()
+    has_tail = keys.str[-6:].str.contains("oint", regex=False)
+    if has_tail.any():
+        keys[has_tail] = keys[has_tail].str.replace(_POINTS_SUFFIX, "", regex=True)
+    return keys
+
+
+# pick_key(pick or alias) -> (category, points, canonical title)
+PICK_LOOKUP = {
+    **{pick_key(k): ("say", pts, k) for k, pts in SAY_POINTS.items()},
+    **{pick_key(k): ("mention", pts, k) for k, pts in MENTION_POINTS.items()},
+}
+PICK_LOOKUP.update({pick_key(alias): PICK_LOOKUP[pick_key(canonical)] for alias, canonical in ALIASES.items()})
+
+
+_local = threading.local()
 
 
 def _conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
+    # One connection per thread, so it is reused by every db call within a
+    # script run instead of reopened per call. Streamlit starts a fresh thread
+    # for each rerun, so this is not shared across reruns or sessions, and
+    # concurrent runs never share transactions (or temp tables).
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(str(DB_PATH))
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        _local.conn = conn
     return conn
 
 
@@ -148,6 +183,17 @@ def init_db():
             snapshot_time TEXT NOT NULL
         );
 
+        -- Current state per market, upserted by save_snapshot alongside the log
+        CREATE TABLE IF NOT EXISTS latest_market (
+            ticker TEXT PRIMARY KEY,
+            event_ticker TEXT NOT NULL,
+            title TEXT NOT NULL,
+            yes_price REAL NOT NULL,
+            status TEXT NOT NULL,
+            result TEXT DEFAULT '',
+            snapshot_time TEXT NOT NULL
+        );
+
         CREATE TABLE IF NOT EXISTS scores (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL UNIQUE,
@@ -155,20 +201,29 @@ def init_db():
             correct_picks INTEGER DEFAULT 0,
             updated_at TEXT NOT NULL
         );
+
+        CREATE INDEX IF NOT EXISTS idx_snaps_event_time ON market_snapshots(event_ticker, snapshot_time);
     """)
-    conn.close()
+
+    # Seed latest_market from an older log once; skip the full scan once it's populated
+    if conn.execute("SELECT 1 FROM latest_market LIMIT 1").fetchone() is None:
+        with conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO latest_market (ticker, event_ticker, title, yes_price, status, result, snapshot_time)
+                SELECT ticker, event_ticker, title, yes_price, status, result, snapshot_time
+                FROM market_snapshots
+                WHERE id IN (SELECT MAX(id) FROM market_snapshots GROUP BY ticker)
+            """)
 
 
 def validate_pick(pick: str) -> tuple[str | None, int, str]:
-    canonical = resolve_pick(pick)
-    if canonical in SAY_POINTS:
-        return "say", SAY_POINTS[canonical], canonical
-    if canonical in MENTION_POINTS:
-        return "mention", MENTION_POINTS[canonical], canonical
-    return None, 0, pick
+    hit = PICK_LOOKUP.get(pick_key(pick))
+    if hit is None:
+        return None, 0, pick
+    return hit
 
 
-def save_picks(df: pd.DataFrame, title_to_ticker: dict[str, dict[str, str]]):
+def save_picks(df: pd.DataFrame, title_to_ticker: dict[tuple[str, str], str]):
     from kalshi import EVENT_TICKERS
 
     conn = _conn()
@@ -177,14 +232,16 @@ def save_picks(df: pd.DataFrame, title_to_ticker: dict[str, dict[str, str]]):
     name_col = next((c for c in df.columns if "name" in c.lower()), "name")
     ts_col = next((c for c in df.columns if "time" in c.lower()), "timestamp")
 
-    for _, row in df.iterrows():
-        name = str(row.get(name_col, "")).strip()
-        ts = str(row.get(ts_col, ""))
+    rows = []
+    cols = df.reindex(columns=[name_col, ts_col, *pick_cols], fill_value="")
+    for name, ts, *picks in cols.itertuples(index=False, name=None):
+        name = str(name).strip()
+        ts = str(ts)
         if not name:
             continue
 
-        for col in pick_cols:
-            raw_val = str(row[col]).strip()
+        for val in picks:
+            raw_val = str(val).strip()
             if not raw_val or raw_val.lower() == "nan":
                 continue
             category, pts, canonical = validate_pick(raw_val)
@@ -192,22 +249,19 @@ def save_picks(df: pd.DataFrame, title_to_ticker: dict[str, dict[str, str]]):
                 continue
 
             event_ticker = EVENT_TICKERS[category]
-            ticker_map = title_to_ticker.get(category, {})
-            market_ticker = ticker_map.get(canonical, "")
-
-            conn.execute(
-                "INSERT INTO picks (timestamp, name, pick, points, market_ticker, event_ticker, locked_at) VALUES (?,?,?,?,?,?,?)",
-                (ts, name, canonical, pts, market_ticker, event_ticker, now),
-            )
+            market_ticker = title_to_ticker.get((category, canonical), "")
+            rows.append((ts, name, canonical, pts, market_ticker, event_ticker, now))
 
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.executemany(
+            "INSERT INTO picks (timestamp, name, pick, points, market_ticker, event_ticker, locked_at) VALUES (?,?,?,?,?,?,?)",
+            rows,
+        )
 
 
 def get_picks() -> pd.DataFrame:
     conn = _conn()
     df = pd.read_sql_query("SELECT * FROM picks ORDER BY name, id", conn)
-    conn.close()
     return df
 
 
@@ -215,59 +269,119 @@ def clear_picks():
     conn = _conn()
     conn.execute("DELETE FROM picks")
     conn.commit()
-    conn.close()
 
 
-def save_snapshot(markets: list[dict]):
+def save_snapshot(markets: list[dict], snapshot_time: str = "") -> int:
+    """Record a poll; returns how many markets changed since their last row."""
     conn = _conn()
-    now = datetime.now(timezone.utc).isoformat()
-    for m in markets:
-        conn.execute(
+    now = snapshot_time or datetime.now(timezone.utc).isoformat()
+    prev = {
+        r["ticker"]: ((r["yes_price"], r["status"], r["result"]), r["snapshot_time"])
+        for r in conn.execute("SELECT ticker, yes_price, status, result, snapshot_time FROM latest_market")
+    }
+    rows = [
+        (
+            m.get("ticker", ""),
+            m.get("event_ticker", ""),
+            m.get("title", m.get("yes_sub_title", "")),
+            float(m.get("last_price_dollars", m.get("yes_price", 0))),
+            m.get("status", ""),
+            m.get("result", ""),
+            now,
+        )
+        for m in markets
+    ]
+    # Skip markets already recorded at this poll (e.g. a cached re-read), then
+    # only log the ones whose price/status/result moved since their last row
+    rows = [r for r in rows if r[0] not in prev or prev[r[0]][1] < now]
+    if not rows:
+        return 0
+    changed = [r for r in rows if r[0] not in prev or prev[r[0]][0] != (r[3], r[4], r[5])]
+    with conn:
+        conn.executemany(
             "INSERT INTO market_snapshots (ticker, event_ticker, title, yes_price, status, result, snapshot_time) VALUES (?,?,?,?,?,?,?)",
-            (
-                m.get("ticker", ""),
-                m.get("event_ticker", ""),
-                m.get("title", m.get("yes_sub_title", "")),
-                float(m.get("last_price_dollars", m.get("yes_price", 0))),
-                m.get("status", ""),
-                m.get("result", ""),
-                now,
-            ),
+            changed,
         )
-    conn.commit()
-    conn.close()
+        conn.executemany("""
+            INSERT INTO latest_market (ticker, event_ticker, title, yes_price, status, result, snapshot_time)
+            VALUES (?,?,?,?,?,?,?)
+            ON CONFLICT(ticker) DO UPDATE SET
+                event_ticker = excluded.event_ticker,
+                title = excluded.title,
+                yes_price = excluded.yes_price,
+                status = excluded.status,
+                result = excluded.result,
+                snapshot_time = excluded.snapshot_time
+        """, rows)
+    return len(changed)
 
 
-def get_snapshots(event_ticker: str = "") -> pd.DataFrame:
+# Column types for snapshot reads, so pandas skips its object-dtype inference pass
+_SNAPSHOT_DTYPES = {"yes_price": "float32", "status": "category", "result": "category"}
+
+
+def get_snapshots(event_ticker: str = "", titles: tuple[str, ...] = ()) -> pd.DataFrame:
     conn = _conn()
+    where, params = [], []
     if event_ticker:
-        df = pd.read_sql_query(
-            "SELECT * FROM market_snapshots WHERE event_ticker = ? ORDER BY snapshot_time",
-            conn,
-            params=(event_ticker,),
-        )
-    else:
-        df = pd.read_sql_query(
-            "SELECT * FROM market_snapshots ORDER BY snapshot_time", conn
-        )
-    conn.close()
+        where.append("event_ticker = ?")
+        params.append(event_ticker)
+    if titles:
+        where.append(f"title IN ({','.join('?' * len(titles))})")
+        params.extend(titles)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    df = pd.read_sql_query(
+        f"SELECT * FROM market_snapshots {clause} ORDER BY snapshot_time",
+        conn,
+        params=params,
+        dtype=_SNAPSHOT_DTYPES,
+        parse_dates=["snapshot_time"],
+    )
     return df
 
 
-def backfill_tickers(title_to_ticker: dict[str, dict[str, str]]):
+def get_latest_snapshots(event_ticker: str) -> pd.DataFrame:
+    conn = _conn()
+    df = pd.read_sql_query(
+        "SELECT * FROM latest_market WHERE event_ticker = ? ORDER BY title",
+        conn,
+        params=(event_ticker,),
+        dtype=_SNAPSHOT_DTYPES,
+        parse_dates=["snapshot_time"],
+    )
+    return df
+
+
+def backfill_tickers(title_to_ticker: dict[tuple[str, str], str]):
     from kalshi import EVENT_TICKERS
     conn = _conn()
-    rows = conn.execute("SELECT id, pick, event_ticker FROM picks WHERE market_ticker = '' OR market_ticker IS NULL").fetchall()
-    for r in rows:
-        pick = r["pick"]
-        for label, et in EVENT_TICKERS.items():
-            if et == r["event_ticker"] or not r["event_ticker"]:
-                ticker = title_to_ticker.get(label, {}).get(pick, "")
-                if ticker:
-                    conn.execute("UPDATE picks SET market_ticker = ?, event_ticker = ? WHERE id = ?", (ticker, et, r["id"]))
-                    break
-    conn.commit()
-    conn.close()
+    # label_order mirrors EVENT_TICKERS so a pick with no event_ticker prefers
+    # the first event that has its title, as the old per-row loop did
+    order = {label: i for i, label in enumerate(EVENT_TICKERS)}
+    vals = [
+        (pick, EVENT_TICKERS[label], ticker, order[label])
+        for (label, pick), ticker in title_to_ticker.items()
+        if ticker
+    ]
+    match = """
+        FROM _ticker_map m
+        WHERE m.pick = picks.pick
+          AND (m.event_ticker = picks.event_ticker OR COALESCE(picks.event_ticker, '') = '')
+    """
+    with conn:
+        conn.execute("DROP TABLE IF EXISTS temp._ticker_map")
+        conn.execute("CREATE TEMP TABLE _ticker_map (pick TEXT, event_ticker TEXT, market_ticker TEXT, label_order INTEGER)")
+        conn.executemany("INSERT INTO _ticker_map VALUES (?,?,?,?)", vals)
+        conn.execute(f"""
+            UPDATE picks
+            SET (market_ticker, event_ticker) = (
+                SELECT m.market_ticker, m.event_ticker {match}
+                ORDER BY m.label_order LIMIT 1
+            )
+            WHERE (market_ticker = '' OR market_ticker IS NULL)
+              AND EXISTS (SELECT 1 {match})
+        """)
+        conn.execute("DROP TABLE temp._ticker_map")
 
 
 def _resolved_yes_expr():
@@ -287,21 +401,16 @@ def calculate_scores() -> pd.DataFrame:
             SUM(CASE WHEN {yes} THEN 1 ELSE 0 END) as correct_picks,
             COUNT(*) as total_picks
         FROM picks p
-        LEFT JOIN (
-            SELECT ticker, title, result, status, yes_price
-            FROM market_snapshots
-            WHERE id IN (SELECT MAX(id) FROM market_snapshots GROUP BY ticker)
-        ) ms ON (p.market_ticker != '' AND p.market_ticker = ms.ticker)
-             OR (p.market_ticker = '' AND p.pick = ms.title)
+        LEFT JOIN latest_market ms
+            ON (p.market_ticker != '' AND p.market_ticker = ms.ticker)
+            OR (p.market_ticker = '' AND p.pick = ms.title)
         GROUP BY p.name
         ORDER BY total_points DESC
     """, conn)
-    conn.close()
 
     now = datetime.now(timezone.utc).isoformat()
-    conn2 = _conn()
     for _, row in df.iterrows():
-        conn2.execute("""
+        conn.execute("""
             INSERT INTO scores (name, total_points, correct_picks, updated_at)
             VALUES (?, ?, ?, ?)
             ON CONFLICT(name) DO UPDATE SET
@@ -309,8 +418,7 @@ def calculate_scores() -> pd.DataFrame:
                 correct_picks = excluded.correct_picks,
                 updated_at = excluded.updated_at
         """, (row["name"], int(row["total_points"]), int(row["correct_picks"]), now))
-    conn2.commit()
-    conn2.close()
+    conn.commit()
     return df
 
 
@@ -320,7 +428,6 @@ def get_leaderboard() -> pd.DataFrame:
         "SELECT name, total_points, correct_picks, updated_at FROM scores ORDER BY total_points DESC",
         conn,
     )
-    conn.close()
     return df
 
 
@@ -339,15 +446,11 @@ def get_pick_details() -> pd.DataFrame:
             COALESCE(ms.status, '') as status,
             COALESCE(ms.yes_price, 0) as yes_price
         FROM picks p
-        LEFT JOIN (
-            SELECT ticker, title, result, status, yes_price
-            FROM market_snapshots
-            WHERE id IN (SELECT MAX(id) FROM market_snapshots GROUP BY ticker)
-        ) ms ON (p.market_ticker != '' AND p.market_ticker = ms.ticker)
-             OR (p.market_ticker = '' AND p.pick = ms.title)
+        LEFT JOIN latest_market ms
+            ON (p.market_ticker != '' AND p.market_ticker = ms.ticker)
+            OR (p.market_ticker = '' AND p.pick = ms.title)
         ORDER BY p.name, p.id
-    """, conn)
-    conn.close()
+    """, conn, dtype=_SNAPSHOT_DTYPES)
     return df
 
 
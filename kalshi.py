@@ -1,5 +1,10 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import orjson
 import requests
-from functools import lru_cache
+from requests.adapters import HTTPAdapter
 
 BASE_URL = "https://api.elections.kalshi.com/trade-api/v2"
 
@@ -8,39 +13,66 @@ EVENT_TICKERS = {
     "mention": "KXTRUMPMENTION-26MAR02",
 }
 
+# Markets are re-polled every 60s by the tracker, so anything younger than
+# that is served from memory instead of hitting the API on every rerun.
+# Entries keep the wall-clock fetch time so callers can stamp data with when
+# it was actually polled rather than when it was read from the cache.
+CACHE_TTL = 55
+_CACHE: dict[str, tuple[float, str, list[dict]]] = {}
+
+# Kalshi caps /markets pages at 1000, which fits a whole event in one request;
+# fall back to the old page size if the API ever rejects it.
+PAGE_LIMIT = 1000
+FALLBACK_PAGE_LIMIT = 200
+
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+
+def get_event_markets(event_ticker: str, force: bool = False) -> tuple[list[dict], str]:
+    cached = _CACHE.get(event_ticker)
+    if not force and cached and time.monotonic() - cached[0] < CACHE_TTL:
+        return cached[2], cached[1]
 
-def get_event_markets(event_ticker: str) -> list[dict]:
     url = f"{BASE_URL}/markets"
+    fetched_at = datetime.now(timezone.utc).isoformat()
     markets = []
     cursor = None
+    limit = PAGE_LIMIT
 
     while True:
-        params = {"event_ticker": event_ticker, "limit": 200}
+        params = {"event_ticker": event_ticker, "limit": limit}
         if cursor:
             params["cursor"] = cursor
-        resp = requests.get(url, params=params, timeout=15)
+        resp = _session.get(url, params=params, timeout=15)
+        if resp.status_code == 400 and limit != FALLBACK_PAGE_LIMIT:
+            limit = FALLBACK_PAGE_LIMIT
+            continue
         resp.raise_for_status()
-        data = resp.json()
+        data = orjson.loads(resp.content)
         markets.extend(data.get("markets", []))
         cursor = data.get("cursor")
         if not cursor:
             break
 
-    return markets
+    _CACHE[event_ticker] = (time.monotonic(), fetched_at, markets)
+    return markets, fetched_at
 
 
 def get_market(ticker: str) -> dict:
     url = f"{BASE_URL}/markets/{ticker}"
-    resp = requests.get(url, timeout=15)
+    resp = _session.get(url, timeout=15)
     resp.raise_for_status()
-    return resp.json().get("market", {})
+    return orjson.loads(resp.content).get("market", {})
 
 
-def fetch_all_markets() -> dict[str, list[dict]]:
-    return {
-        label: get_event_markets(ticker)
-        for label, ticker in EVENT_TICKERS.items()
-    }
+def fetch_all_markets(force: bool = False) -> dict[str, tuple[list[dict], str]]:
+    with ThreadPoolExecutor(max_workers=len(EVENT_TICKERS)) as ex:
+        futures = {
+            label: ex.submit(get_event_markets, ticker, force)
+            for label, ticker in EVENT_TICKERS.items()
+        }
+        return {label: f.result() for label, f in futures.items()}
 
 
 def build_title_to_ticker_map(markets: list[dict]) -> dict[str, str]: